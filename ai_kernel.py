@@ -0,0 +1,150 @@
+"""
+Numba-compiled batch inference over the AI's knowledge base.
+
+Each sentence is packed as a 256-bit cell mask (four uint64 words, enough
+for boards up to 16 x 16) plus a mine count. Subset tests, subtraction
+and resolution then run as a few machine instructions per sentence pair
+instead of Python-level set operations.
+"""
+
+import numpy as np
+from numba import njit, prange
+
+# Number of 64-bit words per cell mask
+WORDS = 4
+
+
+@njit(cache=True)
+def _popcount(x):
+    """
+    Counts the set bits in one 64-bit word (SWAR method).
+    """
+    x = x - ((x >> np.uint64(1)) & np.uint64(0x5555555555555555))
+    x = (x & np.uint64(0x3333333333333333)) + \
+        ((x >> np.uint64(2)) & np.uint64(0x3333333333333333))
+    x = (x + (x >> np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    return np.int64((x * np.uint64(0x0101010101010101)) >> np.uint64(56))
+
+
+@njit(cache=True)
+def infer(masks, counts):
+    """
+    Runs subset inference and resolution over the packed sentences
+    until nothing changes.
+
+    Returns the surviving sentence masks and counts, plus one mask of
+    all cells proven safe and one of all cells proven to be mines.
+    """
+    n = masks.shape[0]
+    cap = 8 * n + 64
+    buf = np.zeros((cap, WORDS), np.uint64)
+    bufc = np.zeros(cap, np.int64)
+    for i in range(n):
+        for w in range(WORDS):
+            buf[i, w] = masks[i, w]
+        bufc[i] = counts[i]
+
+    safe = np.zeros(WORDS, np.uint64)
+    mine = np.zeros(WORDS, np.uint64)
+
+    changed = True
+    while changed:
+        changed = False
+
+        # Resolve sentences whose status is fully determined
+        for i in range(n):
+            size = 0
+            for w in range(WORDS):
+                size += _popcount(buf[i, w])
+            if size == 0:
+                continue
+            if bufc[i] == 0:
+                for w in range(WORDS):
+                    safe[w] |= buf[i, w]
+                    buf[i, w] = np.uint64(0)
+                changed = True
+            elif bufc[i] == size:
+                for w in range(WORDS):
+                    mine[w] |= buf[i, w]
+                    buf[i, w] = np.uint64(0)
+                bufc[i] = 0
+                changed = True
+
+        # Remove resolved cells from the remaining sentences
+        for i in range(n):
+            for w in range(WORDS):
+                hit = buf[i, w] & mine[w]
+                if hit != np.uint64(0):
+                    bufc[i] -= _popcount(hit)
+                    buf[i, w] &= ~mine[w]
+                    changed = True
+                hit = buf[i, w] & safe[w]
+                if hit != np.uint64(0):
+                    buf[i, w] &= ~safe[w]
+                    changed = True
+
+        # Subset inference: a strict subset of b derives (b - a) with
+        # count (count_b - count_a)
+        for i in range(n):
+            empty = True
+            for w in range(WORDS):
+                if buf[i, w] != np.uint64(0):
+                    empty = False
+                    break
+            if empty:
+                continue
+            for j in range(n):
+                if i == j or n >= cap:
+                    continue
+                subset = True
+                equal = True
+                for w in range(WORDS):
+                    if (buf[i, w] & ~buf[j, w]) != np.uint64(0):
+                        subset = False
+                        break
+                    if buf[i, w] != buf[j, w]:
+                        equal = False
+                if not subset or equal:
+                    continue
+                dup = False
+                for k in range(n):
+                    if bufc[k] != bufc[j] - bufc[i]:
+                        continue
+                    same = True
+                    for w in range(WORDS):
+                        if buf[k, w] != (buf[j, w] & ~buf[i, w]):
+                            same = False
+                            break
+                    if same:
+                        dup = True
+                        break
+                if not dup:
+                    for w in range(WORDS):
+                        buf[n, w] = buf[j, w] & ~buf[i, w]
+                    bufc[n] = bufc[j] - bufc[i]
+                    n += 1
+                    changed = True
+
+    return buf[:n], bufc[:n], safe, mine
+
+
+@njit(cache=True, parallel=True)
+def recalc_probs(masks, counts, sizes, hw):
+    """
+    For every cell, takes the minimum count/size ratio over the
+    sentences whose mask contains that cell. Cells covered by no
+    sentence are reported as -1 so the caller leaves them untouched.
+    """
+    probs = np.full(hw, -1.0)
+    for c in prange(hw):
+        w = c // 64
+        bit = np.uint64(1) << np.uint64(c % 64)
+        best = 2.0
+        for s in range(masks.shape[0]):
+            if (masks[s, w] & bit) != np.uint64(0) and sizes[s] > 0:
+                p = counts[s] / sizes[s]
+                if p < best:
+                    best = p
+        if best <= 1.0:
+            probs[c] = best
+    return probs
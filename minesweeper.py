@@ -1,6 +1,16 @@
 import itertools
 import random
-from copy import *
+from collections import deque
+
+import numpy as np
+
+try:
+    from ai_kernel import infer as _infer_kernel
+    from ai_kernel import recalc_probs as _recalc_kernel
+except ImportError:
+    # Numba is unavailable; fall back to pure-Python inference
+    _infer_kernel = None
+    _recalc_kernel = None
 
 
 class Minesweeper():
@@ -16,48 +26,57 @@ class Minesweeper():
         self.mines = set()
 
         # Initialize an empty field with no mines
-        self.board = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                row.append(False)
-            self.board.append(row)
-
-        # Add mines randomly
-        while len(self.mines) != mines:
-            i = random.randrange(height)
-            j = random.randrange(width)
-            if not self.board[i][j]:
-                self.mines.add((i, j))
-                self.board[i][j] = True
+        self.board = np.zeros((height, width), dtype=np.bool_)
+
+        # Add mines randomly by sampling flat indices without
+        # replacement; the Generator draws via a partial Fisher-Yates
+        # in C, so cost stays flat at any mine density
+        rng = np.random.default_rng()
+        flat = rng.choice(height * width, size=mines, replace=False)
+        ii, jj = np.unravel_index(flat, (height, width))
+        self.mines = set(zip(map(int, ii), map(int, jj)))
+        self.board.ravel()[flat] = True
+
+        # Precompute each cell's in-bounds neighbors once; the board
+        # size is fixed, so every later lookup is O(1)
+        self._neighbors = build_neighbor_table(height, width)
+
+        # Mines never move within a game, so every cell's nearby-mine
+        # count is static: a 3x3 sum over the zero-padded board,
+        # computed once as nine shifted slice additions
+        padded = np.zeros((height + 2, width + 2), np.int8)
+        padded[1:-1, 1:-1] = self.board
+        counts = np.zeros((height, width), np.int8)
+        for di in range(3):
+            for dj in range(3):
+                counts += padded[di:di + height, dj:dj + width]
+        self.counts = counts - self.board
 
         # At first, player has found no mines
         self.mines_found = set()
 
-    def __eq__(self, other):
-        self.height = deepcopy(other.height)
-        self.width = deepcopy(other.width)
-        self.mines = deepcopy(other.mines)
-        self.board = deepcopy(other.board)
+    def format(self):
+        """
+        Returns a text-based representation
+        of where mines are located.
+        """
+        lines = []
+        for i in range(self.height):
+            lines.append("--" * self.width + "-")
+            lines.append("".join("|X" if self.board[i][j] else "| "
+                                 for j in range(self.width)) + "|")
+        lines.append("--" * self.width + "-")
+        return "\n".join(lines) + "\n"
 
     def print(self):
         """
         Prints a text-based representation
         of where mines are located.
         """
-        for i in range(self.height):
-            print("--" * self.width + "-")
-            for j in range(self.width):
-                if self.board[i][j]:
-                    print("|X", end="")
-                else:
-                    print("| ", end="")
-            print("|")
-        print("--" * self.width + "-")
+        print(self.format(), end="")
 
     def is_mine(self, cell):
-        i, j = cell
-        return self.board[i][j]
+        return bool(self.board[cell])
 
     def nearby_mines(self, cell):
         """
@@ -66,25 +85,15 @@ class Minesweeper():
         not including the cell itself.
         """
 
-        # Keep count of nearby mines
-        count = 0
-        neighbors = []
+        return self._neighbors[cell], self.nearby_count(cell)
 
-        # Loop over all cells within one row and column
-        for i in range(cell[0] - 1, cell[0] + 2):
-            for j in range(cell[1] - 1, cell[1] + 2):
-
-                # Ignore the cell itself
-                if (i, j) == cell:
-                    continue
-
-                # Update count if cell in bounds and is mine
-                if 0 <= i < self.height and 0 <= j < self.width:
-                    neighbors.append((i, j))
-                    if self.board[i][j]:
-                        count += 1
-
-        return neighbors, count
+    def nearby_count(self, cell):
+        """
+        Returns only the nearby-mine count for a cell, without
+        building a neighbor list. Reads the count grid precomputed
+        at construction.
+        """
+        return int(self.counts[cell])
 
     def won(self):
         """
@@ -92,19 +101,80 @@ class Minesweeper():
         """
         return self.mines_found == self.mines
 
+def build_neighbor_table(height, width):
+    """
+    Maps each cell to a tuple of its in-bounds neighbors.
+    Built once per board size so neighbor lookups never redo
+    the 3x3 iteration and bounds checks.
+    """
+    return {
+        (i, j): tuple(
+            (x, y)
+            for x in range(max(0, i - 1), min(height, i + 2))
+            for y in range(max(0, j - 1), min(width, j + 2))
+            if (x, y) != (i, j)
+        )
+        for i in range(height) for j in range(width)
+    }
+
+
 class Sentence():
     """
     Logical statement about a Minesweeper game
     A sentence consists of a set of board cells,
     and a count of the number of those cells which are mines.
+    The cells are stored as a single int bitmask with bit i*width+j
+    set for cell (i, j), so subset tests, differences and sizes are
+    plain machine integer operations instead of set algebra.
     """
 
-    def __init__(self, cells, count):
-        self.cells = set(cells)
+    def __init__(self, cells, count, width=8):
+        self.width = width
+        if isinstance(cells, int):
+            self.bits = cells
+        else:
+            bits = 0
+            for (i, j) in cells:
+                bits |= 1 << (i * width + j)
+            self.bits = bits
         self.count = count
+        self._update_resolved()
+
+    def _update_resolved(self):
+        """
+        Recomputes the cached resolution flags. They only change when
+        the sentence is mutated, so callers can read plain attributes
+        instead of recomputing sizes on every query.
+        """
+        self._all_safe = (self.count == 0)
+        self._all_mine = (self.count != 0 and self.count == self.size())
+
+    @property
+    def cells(self):
+        """
+        Materializes the bitmask back into a set of (i, j) cells
+        for callers that need to iterate or display them.
+        """
+        cells = set()
+        bits = self.bits
+        while bits:
+            b = bits & -bits
+            idx = b.bit_length() - 1
+            cells.add((idx // self.width, idx % self.width))
+            bits ^= b
+        return cells
+
+    def size(self):
+        """
+        Returns the number of cells in the sentence.
+        """
+        return bin(self.bits).count('1')
 
     def __eq__(self, other):
-        return self.cells == other.cells and self.count == other.count
+        return self.bits == other.bits and self.count == other.count
+
+    def __hash__(self):
+        return hash((self.bits, self.count))
 
     def __str__(self):
         return f"{self.cells} = {self.count}"
@@ -113,9 +183,9 @@ class Sentence():
         """
         Returns the set of all cells in self.cells known to be mines.
         The only time we know cells contain mines for certain is when
-        all the cells in the set are mines. 
+        all the cells in the set are mines.
         """
-        if len(self.cells) == self.count and self.count != 0:
+        if self._all_mine:
             return self.cells
         return set()
 
@@ -125,7 +195,7 @@ class Sentence():
         The only time we know cells are safe for certain is when all
         the cells in the set are safe.
         """
-        if self.count == 0:
+        if self._all_safe:
             return self.cells
         return set()
 
@@ -134,23 +204,27 @@ class Sentence():
         Updates internal knowledge representation given the fact that
         a cell is known to be a mine.
         Since the sentence is only useful to us when the status of a
-        cell is uncertain, we remove any cells whose status has been 
+        cell is uncertain, we remove any cells whose status has been
         confirmed. So we remove the cell, and update self.count.
         """
-        if cell in self.cells:
-            self.cells.remove(cell)
+        b = 1 << (cell[0] * self.width + cell[1])
+        if self.bits & b:
+            self.bits ^= b
             self.count -= 1
+            self._update_resolved()
 
     def mark_safe(self, cell):
         """
         Updates internal knowledge representation given the fact that
         a cell is known to be safe.
-        Since the sentence is only useful to us when the status of a 
+        Since the sentence is only useful to us when the status of a
         cell is uncertain, we remove any cells whose status has been
         confirmed. So we remove the cell, and self.count remains same.
         """
-        if cell in self.cells:
-            self.cells.remove(cell)
+        b = 1 << (cell[0] * self.width + cell[1])
+        if self.bits & b:
+            self.bits ^= b
+            self._update_resolved()
 
 
 
@@ -165,28 +239,91 @@ class MinesweeperAI():
         self.height = height
         self.width = width
 
+        # Cell <-> bit mappings for the state bitmasks
+        self._bit_of = {(i, j): 1 << (i * width + j)
+                        for i in range(height) for j in range(width)}
+        self._cell_of = [(i, j) for i in range(height) for j in range(width)]
+
         # Keep track of which cells have been clicked on
-        self.moves_made = set()
-        
+        self.moves_made_bits = 0
+
         # Keep track of available moves
         self.probs = {}
         for i in range(height):
             for j in range(width):
                 self.probs[(i, j)] = 0
 
-        # Keep track of cells known to be safe or mines
-        self.mines = set()
-        self.safes = set()
+        # Keep track of cells known to be safe or mines, as bitmasks
+        # over the H*W cells; bulk operations are then single int ops
+        self.mines_bits = 0
+        self.safes_bits = 0
+
+        # Lazily cached set views of the bitmasks for iteration and
+        # membership tests from the runner
+        self._mines_cache = (0, set())
+        self._safes_cache = (0, set())
+        self._moves_cache = (0, set())
 
-        # List of sentences about the game known to be true
+        # List of sentences about the game known to be true,
+        # with a parallel set of (bits, count) keys for O(1) dedup
         self.knowledge = []
+        self._knowledge_set = set()
+
+        # Precomputed neighbor lookup, shared logic with Minesweeper,
+        # plus each cell's neighborhood as a single bitmask
+        self._neighbors = build_neighbor_table(height, width)
+        self._neighbor_bits = {
+            cell: sum(self._bit_of[n] for n in neigh)
+            for cell, neigh in self._neighbors.items()
+        }
+
+    def _cells_of(self, bits):
+        """
+        Materializes a state bitmask into a set of (i, j) cells.
+        """
+        cells = set()
+        while bits:
+            b = bits & -bits
+            cells.add(self._cell_of[b.bit_length() - 1])
+            bits ^= b
+        return cells
+
+    @property
+    def mines(self):
+        """
+        Read-only set view of the known-mine bitmask.
+        """
+        if self._mines_cache[0] != self.mines_bits:
+            self._mines_cache = (self.mines_bits,
+                                 self._cells_of(self.mines_bits))
+        return self._mines_cache[1]
+
+    @property
+    def safes(self):
+        """
+        Read-only set view of the known-safe bitmask.
+        """
+        if self._safes_cache[0] != self.safes_bits:
+            self._safes_cache = (self.safes_bits,
+                                 self._cells_of(self.safes_bits))
+        return self._safes_cache[1]
+
+    @property
+    def moves_made(self):
+        """
+        Read-only set view of the moves-made bitmask.
+        """
+        if self._moves_cache[0] != self.moves_made_bits:
+            self._moves_cache = (self.moves_made_bits,
+                                 self._cells_of(self.moves_made_bits))
+        return self._moves_cache[1]
 
     def mark_mine(self, cell):
         """
         Marks a cell as a mine, and updates all knowledge
         to mark that cell as a mine as well.
         """
-        self.mines.add(cell)
+        self.mines_bits |= self._bit_of[cell]
         self.probs.pop(cell, None)
         for sentence in self.knowledge:
             sentence.mark_mine(cell)
@@ -196,102 +333,126 @@ class MinesweeperAI():
         Marks a cell as safe, and updates all knowledge
         to mark that cell as safe as well.
         """
-        self.safes.add(cell)
+        self.safes_bits |= self._bit_of[cell]
         self.probs.pop(cell, None)
         for sentence in self.knowledge:
             sentence.mark_safe(cell)
 
     def getNeighbors(self, cell, count):
-        i, j = cell;
-        neighbors = set()
-        for x in range(i-1, i+2):
-            for y in range(j-1, j+2):
-                n = (x,y)
-                if x >= 0 and x < self.height and \
-                   y >= 0 and y < self.width and \
-                   n not in self.mines and \
-                   n not in self.safes and \
-                   n != cell:
-                    neighbors.add(n)
-                if n in self.mines:
-                    # We reduce the count by one to avoid sentences
-                    # conveying duplicate information.
-                    count -= 1
+        neighBits = self._neighbor_bits[cell]
+        neighbors = neighBits & ~self.mines_bits & ~self.safes_bits
+        # We reduce the count by one per known mine to avoid
+        # sentences conveying duplicate information.
+        count -= bin(neighBits & self.mines_bits).count('1')
         return neighbors, count
 
+    def _add_sentence(self, s):
+        """
+        Appends a sentence to the knowledge base unless an identical
+        one is already present. Returns whether it was added.
+        """
+        key = (s.bits, s.count)
+        if key in self._knowledge_set:
+            return False
+        self._knowledge_set.add(key)
+        self.knowledge.append(s)
+        return True
+
     def updateKnowledge(self, sentence):
-        changesMade = False
-        newSentence = sentence
-        
-        allSafes = set()
-        allMines = set()
-        for s in self.knowledge:
-            if s == sentence:
+        """
+        Propagates a new sentence through the knowledge base with an
+        explicit worklist instead of recursion. Each newly added or
+        modified sentence is compared only against sentences it shares
+        at least one cell with (a single bitmask AND), and anything it
+        derives or mutates is queued until a fixed point is reached.
+        """
+        worklist = deque([sentence])
+        while worklist:
+            cur = worklist.popleft()
+            if cur.bits == 0:
                 continue
 
-            if sentence.cells.issubset(s.cells):
-                newCells = s.cells - sentence.cells
-                newCount = s.count - sentence.count
-                newSentence = Sentence(newCells, newCount)
-
-                if newSentence not in self.knowledge:
-                    changesMade = True
-                    self.knowledge.append(newSentence)
-            
-            elif s.cells.issubset(sentence.cells):
-                newCells = sentence.cells - s.cells
-                newCount = sentence.count - s.count
-                newSentence = Sentence(newCells, newCount)
-
-                if newSentence not in self.knowledge:
-                    changesMade = True
-                    self.knowledge.append(newSentence)
-
-            allSafes |= s.known_safes()
-            allMines |= s.known_mines()
-
-        if len(allSafes) > 0:
-            changesMade = True
-            for safe in allSafes:
-                self.mark_safe(safe)
-        
-        if len(allMines) > 0:
-            changesMade = True
-            for mine in allMines:
-                self.mark_mine(mine)
-            
-        if changesMade:
-            self.updateKnowledge(newSentence)
+            for s in list(self.knowledge):
+                if s is cur or (cur.bits & s.bits) == 0:
+                    continue
+
+                if (cur.bits & s.bits) == cur.bits and cur.bits != s.bits:
+                    newSentence = Sentence(s.bits & ~cur.bits,
+                                           s.count - cur.count, self.width)
+                elif (s.bits & cur.bits) == s.bits:
+                    newSentence = Sentence(cur.bits & ~s.bits,
+                                           cur.count - s.count, self.width)
+                else:
+                    continue
+
+                if self._add_sentence(newSentence):
+                    worklist.append(newSentence)
+
+            # Resolve anything the new inferences settled, and requeue
+            # sentences that marking mutated
+            allSafes = set()
+            allMines = set()
+            for s in self.knowledge:
+                # Pure attribute reads; sets are only built when a
+                # resolution actually fired
+                if s._all_safe and s.bits:
+                    allSafes |= s.cells
+                elif s._all_mine:
+                    allMines |= s.cells
+
+            if allSafes or allMines:
+                before = [(s, s.bits) for s in self.knowledge]
+                for safe in allSafes:
+                    self.mark_safe(safe)
+                for mine in allMines:
+                    self.mark_mine(mine)
+                for s, bits in before:
+                    if s.bits != bits:
+                        worklist.append(s)
 
     def removeEmpties(self):
-        empty = Sentence(set(), 0)
+        empty = Sentence(0, 0, self.width)
         self.knowledge = [x for x in self.knowledge if x != empty]
+        # Refresh the dedup keys, since marking cells mutates sentences
+        self._knowledge_set = {(s.bits, s.count) for s in self.knowledge}
 
-    def removeDupes(self):
-        unique_knowledge = []
-        for s in self.knowledge:
-            if s not in unique_knowledge:
-                unique_knowledge.append(s)
-        self.knowledge = unique_knowledge
-    
     def removeObvious(self):
         for s in self.knowledge:
-            cellsCopy = deepcopy(s.cells)
-            if s.count == 0 and len(s.cells) != 0:
+            # s.cells already materializes a fresh set, so marking can
+            # mutate the sentence while we iterate the snapshot
+            cellsCopy = s.cells
+            if s._all_safe and s.bits != 0:
                 for cell in cellsCopy:
                     self.mark_safe(cell)
-            elif s.count == len(s.cells):
+            elif s._all_mine:
                 for cell in cellsCopy:
                     self.mark_mine(cell)
-    
+
     def recalcProb(self):
-        for s in self.knowledge:
-            if s.cells:
-                prob = s.count / len(s.cells)
-                for cell in s.cells:
-                    if self.probs.get(cell):
-                        if self.probs[cell] > prob:
-                            self.probs[cell] = prob
+        """
+        Sets each available cell's mine probability to the minimum
+        count/size ratio over the sentences that contain it; cells in
+        no sentence keep their current value.
+        """
+        if _recalc_kernel is not None:
+            masks, counts = self._packKnowledge()
+            sizes = np.array([s.size() for s in self.knowledge], np.int64)
+            probs = _recalc_kernel(masks, counts, sizes,
+                                   self.height * self.width)
+            for cell in self.probs:
+                p = probs[cell[0] * self.width + cell[1]]
+                if p >= 0:
+                    self.probs[cell] = float(p)
+        else:
+            best = {}
+            for s in self.knowledge:
+                if s.bits:
+                    prob = s.count / s.size()
+                    for cell in s.cells:
+                        if cell in self.probs:
+                            if cell not in best or prob < best[cell]:
+                                best[cell] = prob
+            self.probs.update(best)
 
     def add_knowledge(self, cell, count):
         """
@@ -309,19 +470,99 @@ class MinesweeperAI():
                if they can be inferred from existing knowledge
         """
         # Mark the cell as safe, and that a move has been made
-        self.moves_made.add(cell)
+        self.moves_made_bits |= self._bit_of[cell]
         self.probs.pop(cell, None)
         self.mark_safe(cell)
         # Add new sentence
         neighborCells, count = self.getNeighbors(cell, count)
-        newSentence = Sentence(neighborCells, count)
-        self.knowledge.append(newSentence)
-        self.updateKnowledge(newSentence)
-        self.removeEmpties()
-        self.removeDupes()
-        self.removeObvious()
+        newSentence = Sentence(neighborCells, count, self.width)
+
+        # If the new sentence is already resolved, no cross-sentence
+        # inference can fire until its cells propagate, so skip the
+        # full subset sweep and just mark them, repeating resolution
+        # until the marking settles
+        if newSentence._all_safe or newSentence._all_mine:
+            for c in newSentence.cells:
+                if newSentence._all_safe:
+                    self.mark_safe(c)
+                else:
+                    self.mark_mine(c)
+            prev = None
+            while prev != [(s.bits, s.count) for s in self.knowledge]:
+                prev = [(s.bits, s.count) for s in self.knowledge]
+                self.removeObvious()
+            self.removeEmpties()
+            self.recalcProb()
+            return
+
+        self._add_sentence(newSentence)
+        if _infer_kernel is not None:
+            self._inferBatch()
+        else:
+            self.updateKnowledge(newSentence)
+            self.removeEmpties()
+            self.removeObvious()
         self.recalcProb()
 
+    def _packKnowledge(self):
+        """
+        Packs self.knowledge into the mask/count arrays the
+        compiled kernel operates on.
+        """
+        n = len(self.knowledge)
+        masks = np.zeros((n, 4), np.uint64)
+        counts = np.zeros(n, np.int64)
+        for idx, s in enumerate(self.knowledge):
+            for w in range(4):
+                masks[idx, w] = (s.bits >> (64 * w)) & 0xFFFFFFFFFFFFFFFF
+            counts[idx] = s.count
+        return masks, counts
+
+    def _unpackMask(self, mask):
+        """
+        Converts a packed cell mask back into a set of (i, j) cells.
+        """
+        cells = set()
+        bits = 0
+        for w in range(4):
+            bits |= int(mask[w]) << (64 * w)
+        while bits:
+            b = bits & -bits
+            idx = b.bit_length() - 1
+            cells.add((idx // self.width, idx % self.width))
+            bits ^= b
+        return cells
+
+    def _inferBatch(self):
+        """
+        Runs the whole inference pass through the compiled kernel:
+        pack the knowledge base, infer to a fixed point in machine
+        code, then unpack the results back into Sentence objects.
+        """
+        masks, counts = self._packKnowledge()
+        newMasks, newCounts, safeMask, mineMask = _infer_kernel(masks, counts)
+        for c in self._unpackMask(safeMask):
+            self.mark_safe(c)
+        for c in self._unpackMask(mineMask):
+            self.mark_mine(c)
+
+        # Rebuild the knowledge base from the surviving sentences,
+        # dropping empties and duplicates as we go
+        knowledge = []
+        seen = set()
+        for idx in range(newMasks.shape[0]):
+            bits = 0
+            for w in range(4):
+                bits |= int(newMasks[idx, w]) << (64 * w)
+            if not bits:
+                continue
+            key = (bits, int(newCounts[idx]))
+            if key not in seen:
+                seen.add(key)
+                knowledge.append(Sentence(bits, int(newCounts[idx]), self.width))
+        self.knowledge = knowledge
+        self._knowledge_set = seen
+
     def make_safe_move(self):
         """
         Returns a safe cell to choose on the Minesweeper board.
@@ -331,9 +572,10 @@ class MinesweeperAI():
         This function may use the knowledge in self.mines, self.safes
         and self.moves_made, but should not modify any of those values.
         """
-        safeCells = self.safes - self.moves_made
-        if safeCells:
-            return safeCells.pop()
+        avail = self.safes_bits & ~self.moves_made_bits
+        if avail:
+            b = avail & -avail
+            return self._cell_of[b.bit_length() - 1]
         return None
 
     def make_random_move(self):
@@ -344,7 +586,7 @@ class MinesweeperAI():
             2) are not known to be mines
         """
         if len(self.probs) > 0:
-            return random.choice(list(self.probs.keys()))
+            return random.choice(list(self.probs))
         return None
         
     def make_calc_move(self):
@@ -352,12 +594,9 @@ class MinesweeperAI():
         Returns the best move to make on the Minesweeper
         board based on probability.
         """
-        if len(self.probs) > 0 and len(list(set(list(self.probs.values())))) > 2:            
-            movesList = [[x, self.probs[x]] for x in self.probs]
-            movesList.sort(key=lambda x: x[1])
-            bestProb = movesList[0][1]
-
-            bestMoves = [x for x in movesList if x[1] == bestProb]
-            return random.choice(bestMoves)[0]
+        if len(self.probs) > 0 and len(set(self.probs.values())) > 2:
+            bestProb = min(self.probs.values())
+            bestMoves = [x for x in self.probs if self.probs[x] == bestProb]
+            return random.choice(bestMoves)
         return None
 
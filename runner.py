@@ -1,7 +1,9 @@
+import atexit
 import pygame
 import sys
 import time
 import os
+from collections import deque
 
 from minesweeper import Minesweeper, MinesweeperAI
 
@@ -44,6 +46,25 @@ numColor = { 1 : BLUE,
              7 : BLACK,
              8 : GRAY }
 
+# Pre-rendered number labels: the font never changes, so rendering
+# each count once beats re-rasterizing it for every tile every frame
+labelSurfaces = {n: mediumFont.render(str(n), True, numColor[n])
+                 for n in range(1, 9)}
+
+# Pre-rendered static UI text; rendering is expensive relative to a
+# blit, and these strings never change
+uiText = { "title" : hugeFont.render("Minesweeper", True, WHITE),
+           "play"  : mediumFont.render("Play Game", True, BLACK),
+           "ai"    : mediumFont.render("AI Move", True, BLACK),
+           "reset" : mediumFont.render("Reset", True, BLACK),
+           "auto"  : mediumFont.render("Automate", True, BLACK),
+           "won"   : mediumFont.render("Won!", True, WHITE),
+           "lost"  : mediumFont.render("Lost!", True, WHITE),
+           "empty" : mediumFont.render("", True, WHITE) }
+
+# Cache of the last rendered elapsed-time string
+timerCache = (None, None)
+
 # Class to handle drop-down menus
 class DropDown():
     def __init__(self, color_menu, color_option, x, y, w, h, font, main, options):
@@ -101,6 +122,20 @@ board_height = height - (BOARD_PADDING * 2)
 cell_size = int(min(board_width / SIZE, board_height / SIZE))
 board_origin = (BOARD_PADDING, BOARD_PADDING)
 
+def build_cell_rects(size, cell_size):
+    """
+    Builds the grid of cell rects once per board size, so the draw
+    and overlay paths never allocate Rects per frame.
+    """
+    return [[pygame.Rect(board_origin[0] + j * cell_size,
+                         board_origin[1] + i * cell_size,
+                         cell_size, cell_size)
+             for j in range(size)] for i in range(size)]
+
+cellRects = build_cell_rects(SIZE, cell_size)
+boardRect = pygame.Rect(board_origin[0], board_origin[1],
+                        SIZE * cell_size, SIZE * cell_size)
+
 
 # Add images
 flag = pygame.image.load(filepath + "/assets/images/flag.png")
@@ -139,26 +174,35 @@ gridMap = { "8 x 8" : 8,
             "12 x 12" : 12,
             "16 x 16" : 16}
 
-def recursive_add(move, game, revealed, ai, checked):
-    checked.append(move)
-    neighbors, nearby = game.nearby_mines(move) 
-    revealed.add(move)
-    ai.add_knowledge(move, nearby)
-    if nearby == 0:
-        for n in neighbors:
-            if n not in checked:
-                revealed, ai, checked = recursive_add(n, game, revealed, ai, checked) 
-    
-    return revealed, ai, checked
+def flood_reveal(start, game, revealed, ai):
+    # Iterative BFS: a set-based visited check keeps flood-fills linear
+    # and avoids blowing the recursion limit on large zero regions
+    q = deque([start])
+    visited = {start}
+    while q:
+        m = q.popleft()
+        neighbors, nearby = game.nearby_mines(m)
+        revealed.add(m)
+        ai.add_knowledge(m, nearby)
+        if nearby == 0:
+            for n in neighbors:
+                if n not in visited:
+                    visited.add(n)
+                    q.append(n)
 
 # Keep track of revealed cells, flagged cells, and if a mine was hit
 revealed = set()
 lost = False
 
+# Cached win status, updated when a move completes rather than
+# comparing the mine sets every frame
+gameWon = False
+
 # Open a logfile
 if os.path.exists(filepath + "/log.txt"):
     os.remove(filepath + "/log.txt")
 log = open("log.txt", "a")
+atexit.register(log.close)
 
 # Set count for number of games played
 countGames = 1
@@ -190,14 +234,16 @@ mainGame = False
 # Set time elasped
 timeElasped = 0
 
+# Frame pacing and a dirty flag so the scene is only redrawn
+# when something may have changed
+clock = pygame.time.Clock()
+needs_redraw = True
+
 while True:
 
     if newGame:
         log.write("Game " + str(countGames) + ":\n")
-        og_stdout = sys.stdout
-        sys.stdout = log
-        game.print()
-        sys.stdout = og_stdout
+        log.write(game.format())
         log.write("Current knowledge:\n")
         for i in ai.knowledge:
             log.write(str(i)+ "\n")
@@ -205,169 +251,164 @@ while True:
         log.flush()
         newGame = False
 
-    screen.fill(BLACK)
+    # Redraw only when something may have changed
+    if needs_redraw:
+        screen.fill(BLACK)
     
-    # Show game instructions
-    if instructions:
+        # Show game instructions
+        if instructions:
 
-        # Title
-        title = hugeFont.render("Minesweeper", True, WHITE)
-        titleRect = title.get_rect()
-        titleRect.center = ((width / 2) + 120, (height / 3) + 70)
-        screen.blit(title, titleRect)
+            # Title
+            title = uiText["title"]
+            titleRect = title.get_rect()
+            titleRect.center = ((width / 2) + 120, (height / 3) + 70)
+            screen.blit(title, titleRect)
 
-        logoRect = pygame.Rect((width / 10), (height / 4), width / 2, height / 2)
-        screen.blit(logo, logoRect)
+            logoRect = pygame.Rect((width / 10), (height / 4), width / 2, height / 2)
+            screen.blit(logo, logoRect)
 
-        # Play game button
-        playButton = pygame.Rect((width / 6), (3 / 4) * height - 20, (width / 2) - 10, 50)
-        playButtonText = mediumFont.render("Play Game", True, BLACK)
-        playButtonRect = playButtonText.get_rect()
-        playButtonRect.center = playButton.center
+            # Play game button
+            playButton = pygame.Rect((width / 6), (3 / 4) * height - 20, (width / 2) - 10, 50)
+            playButtonText = uiText["play"]
+            playButtonRect = playButtonText.get_rect()
+            playButtonRect.center = playButton.center
 
-        mouse = pygame.mouse.get_pos()
+            mouse = pygame.mouse.get_pos()
         
-        gridList.menu_active = gridList.rect.collidepoint(mouse)
-        gridList.active_option = -1
-
-        for i in range(len(gridList.options)):
-            rect = gridList.rect.copy()
-            rect.y += (i+1) * gridList.rect.height
-            if rect.collidepoint(mouse):
-                gridList.active_option = i
-                break
+            gridList.menu_active = gridList.rect.collidepoint(mouse)
+            gridList.active_option = -1
+
+            for i in range(len(gridList.options)):
+                rect = gridList.rect.copy()
+                rect.y += (i+1) * gridList.rect.height
+                if rect.collidepoint(mouse):
+                    gridList.active_option = i
+                    break
                 
-        if not gridList.menu_active and gridList.active_option == -1:
-            gridList.draw_menu = False
+            if not gridList.menu_active and gridList.active_option == -1:
+                gridList.draw_menu = False
 
-        gridList.draw(screen)
+            gridList.draw(screen)
         
-        if playButtonRect.collidepoint(mouse):
-            pygame.draw.rect(screen, GRAY, playButton)
-        else:
-            pygame.draw.rect(screen, WHITE, playButton)
-        screen.blit(playButtonText, playButtonRect)
+            if playButtonRect.collidepoint(mouse):
+                pygame.draw.rect(screen, GRAY, playButton)
+            else:
+                pygame.draw.rect(screen, WHITE, playButton)
+            screen.blit(playButtonText, playButtonRect)
  
-    if mainGame:
-        # Draw board
-        cells = []
-        for i in range(SIZE):
-            row = []
-            for j in range(SIZE):
-
-                # Draw rectangle for cell
-                rect = pygame.Rect(
-                    board_origin[0] + j * cell_size,
-                    board_origin[1] + i * cell_size,
-                    cell_size, cell_size
-                )
-            
-                if (i, j) in revealed:
-                    pygame.draw.rect(screen, BLACK, rect)
-                else:
-                    pygame.draw.rect(screen, GRAY, rect)
-                pygame.draw.rect(screen, WHITE, rect, 3)
-            
-                # Add a mine, flag, or number if needed
-                if game.is_mine((i, j)) and lost:
-                    screen.blit(mine, rect)
-                elif (i, j) in ai.mines:
-                    screen.blit(flag, rect)
-                elif (i, j) in revealed:
-                    cellCount = game.nearby_mines((i, j))[1]
-                    if cellCount != 0:
-                        neighbors = mediumFont.render(
-                            str(cellCount),
-                            True, 
-                            numColor[cellCount]
-                        )
-                        neighborsTextRect = neighbors.get_rect()
-                        neighborsTextRect.center = rect.center
-                        screen.blit(neighbors, neighborsTextRect)
-
-                row.append(rect)
-            cells.append(row)
-
-        catRect = pygame.Rect((7 / 10) * width + 20, (height / 15), width / 2, height / 2)
-        pizzaRect = pygame.Rect((7 / 10) * width + 20, (height / 15), width / 2, height / 2)
-        cryRect = pygame.Rect((7 / 10) * width - 20, (height / 15) - 40, width / 2, height / 2)
+        if mainGame:
+            # Draw board: one background fill, a fill per revealed cell,
+            # then the grid lines
+            screen.fill(GRAY, boardRect)
+            for (i, j) in revealed:
+                screen.fill(BLACK, cellRects[i][j])
+            for k in range(SIZE + 1):
+                x = board_origin[0] + k * cell_size
+                y = board_origin[1] + k * cell_size
+                pygame.draw.line(screen, WHITE, (x, boardRect.top), (x, boardRect.bottom), 3)
+                pygame.draw.line(screen, WHITE, (boardRect.left, y), (boardRect.right, y), 3)
+
+            # Add mines, flags and numbers only where needed
+            if lost:
+                for (i, j) in game.mines:
+                    screen.blit(mine, cellRects[i][j])
+            for (i, j) in ai.mines:
+                if not lost or (i, j) not in game.mines:
+                    screen.blit(flag, cellRects[i][j])
+            for (i, j) in revealed:
+                if (i, j) in ai.mines or (lost and (i, j) in game.mines):
+                    continue
+                cellCount = game.nearby_count((i, j))
+                if cellCount != 0:
+                    neighbors = labelSurfaces[cellCount]
+                    neighborsTextRect = neighbors.get_rect(center=cellRects[i][j].center)
+                    screen.blit(neighbors, neighborsTextRect)
+
+            catRect = pygame.Rect((7 / 10) * width + 20, (height / 15), width / 2, height / 2)
+            pizzaRect = pygame.Rect((7 / 10) * width + 20, (height / 15), width / 2, height / 2)
+            cryRect = pygame.Rect((7 / 10) * width - 20, (height / 15) - 40, width / 2, height / 2)
         
-        if game.mines == ai.mines:
-            screen.blit(pizza, pizzaRect)
-        elif lost:
-            screen.blit(cry, cryRect)
-        else:
-            screen.blit(cat, catRect)
-
-        # AI Move button
-        aiButton = pygame.Rect(
-            (2 / 3) * width + BOARD_PADDING, (2 / 3) * height - 30,
-            (width / 3) - BOARD_PADDING * 3.5, 50
-        )
-        aiButtonText = mediumFont.render("AI Move", True, BLACK)
-        aiButtonRect = aiButtonText.get_rect()
-        aiButtonRect.center = aiButton.center
+            if gameWon:
+                screen.blit(pizza, pizzaRect)
+            elif lost:
+                screen.blit(cry, cryRect)
+            else:
+                screen.blit(cat, catRect)
+
+            # AI Move button
+            aiButton = pygame.Rect(
+                (2 / 3) * width + BOARD_PADDING, (2 / 3) * height - 30,
+                (width / 3) - BOARD_PADDING * 3.5, 50
+            )
+            aiButtonText = uiText["ai"]
+            aiButtonRect = aiButtonText.get_rect()
+            aiButtonRect.center = aiButton.center
         
-        # Reset button
-        resetButton = pygame.Rect(
-            (2 / 3) * width + BOARD_PADDING, (2 / 3) * height + 40,
-            (width / 3) - BOARD_PADDING * 3.5, 50
-        )
-        resetButtonText = mediumFont.render("Reset", True, BLACK)
-        resetButtonRect = resetButtonText.get_rect()
-        resetButtonRect.center = resetButton.center
-        pygame.draw.rect(screen, WHITE, resetButton)
-        screen.blit(resetButtonText, resetButtonRect)
+            # Reset button
+            resetButton = pygame.Rect(
+                (2 / 3) * width + BOARD_PADDING, (2 / 3) * height + 40,
+                (width / 3) - BOARD_PADDING * 3.5, 50
+            )
+            resetButtonText = uiText["reset"]
+            resetButtonRect = resetButtonText.get_rect()
+            resetButtonRect.center = resetButton.center
+            pygame.draw.rect(screen, WHITE, resetButton)
+            screen.blit(resetButtonText, resetButtonRect)
     
-        # Automate button
-        autoButton = pygame.Rect(
-            (2 / 3) * width + BOARD_PADDING, (2 / 3) * height + 110,
-            (width / 3) - BOARD_PADDING * 3.5, 50
-        )
-        autoButtonText = mediumFont.render("Automate", True, BLACK)
-        autoButtonRect = autoButtonText.get_rect()
-        autoButtonRect.center = autoButton.center
-        pygame.draw.rect(screen, WHITE, autoButton)
-        screen.blit(autoButtonText, autoButtonRect)
+            # Automate button
+            autoButton = pygame.Rect(
+                (2 / 3) * width + BOARD_PADDING, (2 / 3) * height + 110,
+                (width / 3) - BOARD_PADDING * 3.5, 50
+            )
+            autoButtonText = uiText["auto"]
+            autoButtonRect = autoButtonText.get_rect()
+            autoButtonRect.center = autoButton.center
+            pygame.draw.rect(screen, WHITE, autoButton)
+            screen.blit(autoButtonText, autoButtonRect)
         
-        mouse = pygame.mouse.get_pos()
+            mouse = pygame.mouse.get_pos()
         
-        if aiButtonRect.collidepoint(mouse):
-            pygame.draw.rect(screen, GRAY, aiButton)
-        else:
-            pygame.draw.rect(screen, WHITE, aiButton)
-        screen.blit(aiButtonText, aiButtonRect)
+            if aiButtonRect.collidepoint(mouse):
+                pygame.draw.rect(screen, GRAY, aiButton)
+            else:
+                pygame.draw.rect(screen, WHITE, aiButton)
+            screen.blit(aiButtonText, aiButtonRect)
         
-        if resetButtonRect.collidepoint(mouse):
-            pygame.draw.rect(screen, GRAY, resetButton)
-        else:
-            pygame.draw.rect(screen, WHITE, resetButton)
-        screen.blit(resetButtonText, resetButtonRect)
+            if resetButtonRect.collidepoint(mouse):
+                pygame.draw.rect(screen, GRAY, resetButton)
+            else:
+                pygame.draw.rect(screen, WHITE, resetButton)
+            screen.blit(resetButtonText, resetButtonRect)
         
-        if autoButtonRect.collidepoint(mouse):
-            pygame.draw.rect(screen, GRAY, autoButton)
-        else:
-            pygame.draw.rect(screen, WHITE, autoButton)
-        screen.blit(autoButtonText, autoButtonRect)
-
-        # Display text
-        text = "Lost!" if lost else "Won!" if game.mines == ai.mines else ""
-        text = mediumFont.render(text, True, WHITE)
-        textRect = text.get_rect()
-        textRect.center = ((3 / 4) * width - 40, (1 / 2) * height + 10)
-        screen.blit(text, textRect)
+            if autoButtonRect.collidepoint(mouse):
+                pygame.draw.rect(screen, GRAY, autoButton)
+            else:
+                pygame.draw.rect(screen, WHITE, autoButton)
+            screen.blit(autoButtonText, autoButtonRect)
+
+            # Display text
+            text = uiText["lost"] if lost else \
+                uiText["won"] if gameWon else uiText["empty"]
+            textRect = text.get_rect()
+            textRect.center = ((3 / 4) * width - 40, (1 / 2) * height + 10)
+            screen.blit(text, textRect)
         
-        if lost or game.mines == ai.mines:
-            timeText = "Time elasped: " + str(timeElasped) + "s"
-            timeText = mediumFont.render(timeText, True, WHITE)
-            timeTextRect = timeText.get_rect()
-            timeTextRect.center = ((3 / 4) * width + 70, (1 / 2) * height + 50)
-            screen.blit(timeText, timeTextRect)
+            if lost or gameWon:
+                timeStr = "Time elasped: " + str(timeElasped) + "s"
+                if timerCache[0] != timeStr:
+                    timerCache = (timeStr, mediumFont.render(timeStr, True, WHITE))
+                timeText = timerCache[1]
+                timeTextRect = timeText.get_rect()
+                timeTextRect.center = ((3 / 4) * width + 70, (1 / 2) * height + 50)
+                screen.blit(timeText, timeTextRect)
+
+        pygame.display.flip()
+        needs_redraw = False
 
-        move = None
 
     # Event handler
     for event in pygame.event.get():
+        needs_redraw = True
         if event.type == pygame.QUIT:
             log.close()
             sys.exit()
@@ -383,9 +424,23 @@ while True:
                     SIZE = gridMap[gridList.main]
                     MINES = (5 * SIZE * SIZE) // 32
                     cell_size = int(min(board_width / SIZE, board_height / SIZE))
+                    cellRects = build_cell_rects(SIZE, cell_size)
+                    boardRect = pygame.Rect(board_origin[0], board_origin[1],
+                                            SIZE * cell_size, SIZE * cell_size)
                     flag = pygame.transform.scale(flag, (cell_size, cell_size))
                     mine = pygame.transform.scale(mine, (cell_size, cell_size))
 
+                    # The game and AI must match the selected grid, or
+                    # the draw path would index cells outside cellRects
+                    if game.height != SIZE:
+                        game = Minesweeper(height=SIZE, width=SIZE, mines=MINES)
+                        ai = MinesweeperAI(height=SIZE, width=SIZE)
+                        revealed = set()
+                        lost = False
+                        gameWon = False
+                        countMoves = 0
+                        newGame = True
+
                 if playButton.collidepoint(event.pos):
                     instructions = False
                     mainGame = True
@@ -400,6 +455,7 @@ while True:
                     ai = MinesweeperAI(height=SIZE, width=SIZE)
                     revealed = set()
                     lost = False
+                    gameWon = False
                     startTime = 0
                     automate = False
                     selected_option = -1
@@ -411,19 +467,22 @@ while True:
                     continue
         
                 # Automate game
-                elif autoButton.collidepoint(event.pos) and game.mines != ai.mines and not lost:
+                elif autoButton.collidepoint(event.pos) and not gameWon and not lost:
                     automate = True
                     startTime = time.time()
 
-                # User-made move
+                # User-made move: the board is a regular grid, so the
+                # clicked cell follows directly from the coordinates
                 elif not lost:
-                    for i in range(SIZE):
-                        for j in range(SIZE):
-                            if cells[i][j].collidepoint(event.pos) and (i, j) not in revealed:
-                                move = (i, j)
+                    mx, my = event.pos
+                    j = (mx - board_origin[0]) // cell_size
+                    i = (my - board_origin[1]) // cell_size
+                    if 0 <= i < SIZE and 0 <= j < SIZE and (i, j) not in revealed:
+                        move = (i, j)
     
     # Perform AI move if needed
     if automate or buttonClicked:
+        needs_redraw = True
         move = ai.make_safe_move()
         if move is None:
             move = ai.make_calc_move()
@@ -431,6 +490,7 @@ while True:
                 move = ai.make_random_move()
                 if move is None:
                     log.write("No moves left to make.\n\n")
+                    log.flush()
                     automate = False
                     endTime = time.time()
                     timeElasped = round(endTime - startTime, 2)
@@ -450,28 +510,30 @@ while True:
         if game.is_mine(move):
             lost = True
             log.write("Game lost!\n\n")
+            log.flush()
             automate = False
             endTime = time.time()
             timeElasped = round(endTime - startTime, 2)
 
         else:
-            checked = []
-            revealed, ai, checked = recursive_add(move, game, revealed, ai, checked) 
-
-            log.write("Current knowledge:\n")
-            for i in ai.knowledge:
-                log.write(str(i) + "\n")
-            log.write("Current known safes:\n")
-            for i in ai.safes:
-                log.write(str(i) + " ")
-            log.write("\nCurrent known mines:\n")
-            for i in ai.mines:
-                log.write(str(i) + " ")
-            log.write("\nCurrent known probabilities:\n")
-            for i in ai.probs:
-                if ai.probs[i] != 0:
-                    log.write(str(i) + ": " + str(ai.probs[i]) + " ")
-            log.write("\n\n")
-            log.flush()
+            flood_reveal(move, game, revealed, ai)
+            gameWon = game.mines == ai.mines
+
+            # Batch the per-move log output into one write, and let
+            # block buffering decide when it reaches the disk
+            chunks = ["Current knowledge:\n"]
+            chunks.extend(str(i) + "\n" for i in ai.knowledge)
+            chunks.append("Current known safes:\n")
+            chunks.append(" ".join(str(i) for i in ai.safes))
+            chunks.append("\nCurrent known mines:\n")
+            chunks.append(" ".join(str(i) for i in ai.mines))
+            chunks.append("\nCurrent known probabilities:\n")
+            chunks.append(" ".join(str(i) + ": " + str(ai.probs[i])
+                                   for i in ai.probs if ai.probs[i] != 0))
+            chunks.append("\n\n")
+            log.write("".join(chunks))
     
-    pygame.display.flip()
+    move = None
+
+    # Cap the frame rate; an idle loop now just waits out its tick
+    clock.tick(60 if automate else 30)